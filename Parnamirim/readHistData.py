@@ -8,27 +8,65 @@ import os
 _script_dir = os.path.dirname(os.path.abspath(__file__))
 _csv_path = os.path.join(_script_dir, '..', 'data', 'Parnamirim.csv')
 
-_df = pd.read_csv(_csv_path)
+# The CSV is only read (and the interpolants built) on first access to one of
+# these names, so importing just normal/plateau/phi stays cheap.
+_climate_names = ('vetDias', 'vetTemp', 'vetPluv', 'temperature', 'pluviosity')
 
-# Days are calculated as month index * 30
-vetDias = [i * 30 for i in range(len(_df))]
+def _load_climate():
+    _df = pd.read_csv(_csv_path)
 
-# Temperature data (mean_t_med from CSV)
-vetTemp = _df['mean_t_med'].values
+    # Days are calculated as month index * 30
+    vetDias = np.arange(len(_df)) * 30
 
-# Pluviosity data (mean_prec from CSV)
-vetPluv = _df['mean_prec'].values
+    # Temperature data (mean_t_med from CSV)
+    vetTemp = _df['mean_t_med'].values
 
-temperature = interp1d(vetDias, np.array(vetTemp), kind='linear', fill_value='extrapolate')
-pluviosity = interp1d(vetDias, vetPluv, kind='linear', fill_value='extrapolate')
+    # Pluviosity data (mean_prec from CSV)
+    vetPluv = _df['mean_prec'].values
+
+    # Days are already increasing, so skip interp1d's argsort and array copies
+    temperature = interp1d(vetDias, vetTemp, kind='linear', fill_value='extrapolate',
+                           assume_sorted=True, copy=False)
+    pluviosity = interp1d(vetDias, vetPluv, kind='linear', fill_value='extrapolate',
+                          assume_sorted=True, copy=False)
+
+    globals().update(vetDias=vetDias, vetTemp=vetTemp, vetPluv=vetPluv,
+                     temperature=temperature, pluviosity=pluviosity)
+
+def __getattr__(name):
+    if name in _climate_names:
+        _load_climate()
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def __dir__():
+    return sorted(set(globals()) | set(_climate_names))
+
+# Star-imports of the lazy names also go through __getattr__
+__all__ = list(_climate_names) + ['normal', 'plateau', 'phi', 'make_normal', 'make_plateau']
 
 
 # Some functions:
 def normal(R, mu, T):
-    return np.e**(-(T-mu)**2/(2*R))
+    return np.exp(-(T-mu)**2/(2*R))
 
 def plateau(R, mu, T):
-    return np.e**(-(T-mu)**8/(2*R)**5)
+    return np.exp(-(T-mu)**8/(2*R)**5)
 
 def phi(P):
     return (erf((P-10)/40) + 0.3)/1.2
+
+
+# Lookup-table versions for fixed (R, mu): sample once on a temperature grid
+# and interpolate, instead of re-evaluating exp at every call.
+def _make_lut(f, R, mu, T_lo, T_hi, step):
+    T = np.arange(T_lo, T_hi + step, step)
+    y = f(R, mu, T)
+    return interp1d(T, y, kind='linear', assume_sorted=True, copy=False,
+                    bounds_error=False, fill_value=(y[0], y[-1]))
+
+def make_normal(R, mu, T_lo=0, T_hi=45, step=0.05):
+    return _make_lut(normal, R, mu, T_lo, T_hi, step)
+
+def make_plateau(R, mu, T_lo=0, T_hi=45, step=0.05):
+    return _make_lut(plateau, R, mu, T_lo, T_hi, step)
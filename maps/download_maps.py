@@ -18,10 +18,19 @@ House Index with Four Alternative Traps" - PLoS Neglected Tropical Diseases
 
 import os
 import json
-import requests
+import asyncio
+import contextlib
+import email.utils
+import functools
+import hashlib
+import httpx
 import math
-import time
+import secrets
+import shutil
+from datetime import datetime, timezone
 from pathlib import Path
+from urllib.parse import urlencode, urlsplit
+from PIL import Image
 
 # ============================================================================
 # CONFIGURATION - ADD YOUR API KEY HERE
@@ -104,10 +113,72 @@ SCALE = 2
 # Final image dimensions (640 * scale = 1280 pixels for scale=2)
 FINAL_SIZE = IMAGE_SIZE * SCALE
 
+STATIC_MAPS_URL = "https://maps.googleapis.com/maps/api/staticmap"
+
+# Characters left unescaped in query strings (used by center and style values)
+URL_SAFE_CHARS = ':|,'
+
+# ============================================================================
+# DOWNLOAD SETTINGS
+# ============================================================================
+
+# Maximum number of map requests in flight at the same time
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Maximum number of map requests started per second (including retries)
+MAX_REQUESTS_PER_SECOND = 10
+
+# Retry policy for rate-limit (429) and transient server errors.
+# Backoff (seconds) is doubled on each retry.
+RETRY_STATUSES = (429, 500, 502, 503)
+RETRY_BACKOFF = 1
+MAX_RETRIES = 5
+
+# Idle pooled connections are kept alive for reuse (seconds)
+KEEPALIVE_TIMEOUT = 30
+REQUEST_TIMEOUT = 30
+
+# Content-addressed cache shared by every run, regardless of --output-dir.
+# Files are named after the SHA-256 of the request URL (API key excluded).
+CACHE_DIR = Path.home() / ".cache" / "fitting_aedes" / "maps"
+
+# Buffer size for image writes; a whole map fits in one or two writes
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Size of the chunks read from the HTTP response while streaming to disk
+STREAM_CHUNK_SIZE = 1 << 16
+
+# When over quota Google still replies 200 with a small error image, so
+# anything that is not a PNG of at least this size is rejected (the smallest
+# study-area roadmap is ~40 KB, satellite images are >1 MB)
+MIN_IMAGE_BYTES = 20_000
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# RGB roadmaps with at most this many distinct colors are stored as palette
+# PNGs. The conversion is exact: images with more colors, and the palette
+# PNGs Google usually serves, are kept as downloaded so the pixel colors used
+# for terrain classification never change (set to None to disable).
+# Satellite images are always kept as downloaded.
+ROADMAP_PALETTE_COLORS = 64
+
 # ============================================================================
 # MAP STYLE FOR ROADMAP
 # ============================================================================
 
+# (JSON section, JSON property, Static Maps element) for each supported style
+# rule, in the order the parameters are emitted. 'visible' rules only produce
+# a parameter when set to false; the others are colors.
+STYLE_RULES = (
+    ('geometry', 'fillColor', 'geometry.fill'),
+    ('geometry', 'strokeColor', 'geometry.stroke'),
+    ('geometry', 'visible', 'geometry'),
+    ('label', 'visible', 'labels'),
+    ('label', 'textFillColor', 'labels.text.fill'),
+    ('label', 'textStrokeColor', 'labels.text.stroke'),
+)
+
+
+@functools.lru_cache(maxsize=1)
 def load_map_style():
     """Load the custom map style from mapStyle.json"""
     style_path = Path(__file__).parent / "mapStyle.json"
@@ -143,45 +214,36 @@ def convert_style_to_url_params(style_json):
         style_id = style.get('id', '')
         feature_type = feature_mapping.get(style_id, style_id.replace('.', '.'))
 
-        # Handle geometry styles
-        if 'geometry' in style:
-            geom = style['geometry']
-            if 'fillColor' in geom:
-                color = geom['fillColor'].replace('#', '0x')
-                style_params.append(f"style=feature:{feature_type}|element:geometry.fill|color:{color}")
-            if 'strokeColor' in geom:
-                color = geom['strokeColor'].replace('#', '0x')
-                style_params.append(f"style=feature:{feature_type}|element:geometry.stroke|color:{color}")
-            if geom.get('visible') == False:
-                style_params.append(f"style=feature:{feature_type}|element:geometry|visibility:off")
-
-        # Handle label styles
-        if 'label' in style:
-            label = style['label']
-            if label.get('visible') == False:
-                style_params.append(f"style=feature:{feature_type}|element:labels|visibility:off")
-            if 'textFillColor' in label:
-                color = label['textFillColor'].replace('#', '0x')
-                style_params.append(f"style=feature:{feature_type}|element:labels.text.fill|color:{color}")
-            if 'textStrokeColor' in label:
-                color = label['textStrokeColor'].replace('#', '0x')
-                style_params.append(f"style=feature:{feature_type}|element:labels.text.stroke|color:{color}")
+        for section, key, element in STYLE_RULES:
+            props = style.get(section)
+            if not props or key not in props:
+                continue
+            value = props[key]
+            if key == 'visible':
+                if value == False:
+                    style_params.append(f"style=feature:{feature_type}|element:{element}|visibility:off")
+            else:
+                color = value.replace('#', '0x')
+                style_params.append(f"style=feature:{feature_type}|element:{element}|color:{color}")
 
     return style_params
 
 
+@functools.lru_cache(maxsize=1)
 def get_roadmap_style_string():
     """
     Generate style string for a clean roadmap suitable for analysis.
     This creates a simplified map showing only roads and basic land features.
+
+    The result is cached, so it is returned as a tuple to keep it immutable.
     """
     # Load custom style if available
     style_json = load_map_style()
     if style_json:
-        return convert_style_to_url_params(style_json)
+        return tuple(convert_style_to_url_params(style_json))
 
     # Fallback: Create a clean roadmap style programmatically
-    styles = [
+    styles = (
         # Hide all labels
         "style=feature:all|element:labels|visibility:off",
         # Simple land color
@@ -194,10 +256,23 @@ def get_roadmap_style_string():
         "style=feature:transit|visibility:off",
         # Hide administrative boundaries
         "style=feature:administrative|element:labels|visibility:off",
-    ]
+    )
     return styles
 
 
+def encode_style_params(style_params):
+    """URL-encode a list of "style=..." parameters into a query string fragment."""
+    return urlencode([tuple(style.split('=', 1)) for style in style_params], safe=URL_SAFE_CHARS)
+
+
+# Style parameters are identical for every map of a given type, so build them once
+MAP_STYLE_SUFFIXES = {
+    # Hide all labels for clean satellite imagery
+    'satellite': "&" + encode_style_params(["style=feature:all|element:labels|visibility:off"]),
+    'roadmap': "&" + encode_style_params(get_roadmap_style_string()),
+}
+
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -211,6 +286,7 @@ def meters_per_pixel(lat, zoom):
     return 156543.03392 * math.cos(math.radians(lat)) / (2 ** zoom)
 
 
+@functools.lru_cache(maxsize=None)
 def calculate_zoom_for_1km(lat, image_size=640, scale=2):
     """
     Calculate the zoom level needed to capture approximately 1km width.
@@ -221,20 +297,38 @@ def calculate_zoom_for_1km(lat, image_size=640, scale=2):
     - Zoom 18: ~0.6m/px -> 640px = 384m
 
     For 1km coverage with 640px base image, we want zoom ~17
+
+    Coverage halves with each zoom step, so the zoom closest to 1km is the
+    first one whose coverage drops to 4/3 km (the midpoint between c and c/2
+    lies at 1km when c = 4/3 km). Result is clamped to zoom 14-20.
     """
     target_meters = 1000  # 1 km
-    best_zoom = 17
-    best_diff = float('inf')
+    coverage_zoom0 = meters_per_pixel(lat, 0) * image_size
+    zoom = math.ceil(math.log2(coverage_zoom0 / (target_meters * 4 / 3)))
+    return max(14, min(20, zoom))
 
-    for zoom in range(14, 21):
-        mpp = meters_per_pixel(lat, zoom)
-        coverage = mpp * image_size
-        diff = abs(coverage - target_meters)
-        if diff < best_diff:
-            best_diff = diff
-            best_zoom = zoom
 
-    return best_zoom
+@functools.lru_cache(maxsize=None)
+def build_map_url(lat, lon, zoom, maptype, api_key):
+    """
+    Build the Static Maps API URL for one map.
+
+    Args:
+        lat: Latitude of center point
+        lon: Longitude of center point
+        zoom: Zoom level (see calculate_zoom_for_1km)
+        maptype: 'satellite' or 'roadmap'
+        api_key: Google Maps API key
+    """
+    params = {
+        'center': f"{lat},{lon}",
+        'zoom': zoom,
+        'size': f"{IMAGE_SIZE}x{IMAGE_SIZE}",
+        'scale': SCALE,
+        'maptype': maptype,
+        'key': api_key,
+    }
+    return f"{STATIC_MAPS_URL}?{urlencode(params, safe=URL_SAFE_CHARS)}{MAP_STYLE_SUFFIXES[maptype]}"
 
 
 def create_directory_structure(base_path):
@@ -250,88 +344,381 @@ def create_directory_structure(base_path):
     print(f"Created directory structure at: {base_path}")
 
 
-def download_satellite_map(lat, lon, output_path, api_key):
+def create_client():
+    """
+    Create the HTTP client shared by every download of a run.
+
+    All requests go to maps.googleapis.com, which speaks HTTP/2, so the
+    downloads are multiplexed over pooled keep-alive connections instead
+    of paying a new TLS handshake per image. HTTP/2 support comes from the
+    httpx[http2] extra declared in pyproject.toml.
+    """
+    limits = httpx.Limits(
+        max_connections=MAX_CONCURRENT_DOWNLOADS,
+        max_keepalive_connections=MAX_CONCURRENT_DOWNLOADS,
+        keepalive_expiry=KEEPALIVE_TIMEOUT,
+    )
+    return httpx.AsyncClient(http2=True, limits=limits, timeout=REQUEST_TIMEOUT)
+
+
+def get_cache_path(url):
+    """
+    Return the cache file for a Static Maps URL.
+
+    The `key` parameter is dropped before hashing so the same logical
+    request still hits the cache after an API key rotation.
+    """
+    parts = urlsplit(url)
+    query = "&".join(p for p in parts.query.split("&") if not p.startswith("key="))
+    cache_key = hashlib.sha256(f"{parts.netloc}{parts.path}?{query}".encode()).hexdigest()
+    return CACHE_DIR / f"{cache_key}.png"
+
+
+@contextlib.contextmanager
+def atomic_write(path):
+    """
+    Write a file through a temporary sibling and rename it into place.
+
+    Yields a readable and writable binary file object buffered with
+    WRITE_BUFFER_SIZE. An interrupted write never leaves a partial file at
+    `path`, so the "already exists" checks and the cache stay trustworthy.
+    The temporary file is created with mode 0o666 so the kernel applies
+    the umask, giving the same permissions as open().
+    """
+    path = Path(path)
+    tmp_path = path.parent / f".{path.name}.{secrets.token_hex(8)}.part"
+    fd = os.open(tmp_path, os.O_RDWR | os.O_CREAT | os.O_EXCL, 0o666)
+    with os.fdopen(fd, 'r+b', buffering=WRITE_BUFFER_SIZE) as tmp:
+        try:
+            yield tmp
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp_path)
+            raise
+    os.replace(tmp_path, path)
+
+
+def link_from_cache(cache_path, output_path):
+    """Hard-link a cached image into place, copying if linking is not possible."""
+    try:
+        os.link(cache_path, output_path)
+    except OSError:
+        with open(cache_path, 'rb') as src, atomic_write(output_path) as dst:
+            shutil.copyfileobj(src, dst, WRITE_BUFFER_SIZE)
+
+
+async def throttle(rate_sem):
+    """
+    Wait for a request slot, keeping at most MAX_REQUESTS_PER_SECOND starts per second.
+
+    Each acquired slot is handed back one second later, so the semaphore
+    behaves as a token bucket refilled at MAX_REQUESTS_PER_SECOND.
+    """
+    await rate_sem.acquire()
+    asyncio.get_running_loop().call_later(1, rate_sem.release)
+
+
+def quantize_roadmap(im):
+    """
+    Losslessly convert an RGB roadmap to palette mode, if it has few enough colors.
+
+    Returns the converted image, or None to keep the file as downloaded.
+    """
+    if ROADMAP_PALETTE_COLORS is None or im.mode != 'RGB':
+        return None
+    colors = im.getcolors(ROADMAP_PALETTE_COLORS)
+    if colors is None:
+        return None
+
+    # Map onto a palette of exactly the colors present, so no pixel changes
+    palette = Image.new('P', (1, 1))
+    palette.putpalette([channel for _, rgb in colors for channel in rgb])
+    return im.quantize(palette=palette, dither=Image.Dither.NONE)
+
+
+def finalize_image(f, postprocess=None):
+    """
+    Decode a downloaded PNG and apply `postprocess` to it, in place.
+
+    `f` is the still-open temporary file from atomic_write, so nothing is
+    published to the cache until the image is known to be valid.
+    `postprocess` receives the decoded image and returns a replacement
+    image (or None to keep the file as is).
+
+    Raises:
+        ValueError: if the image cannot be decoded or processed
+    """
+    f.flush()
+    f.seek(0)
+    try:
+        with Image.open(f) as im:
+            im.load()
+            processed = postprocess(im) if postprocess is not None else None
+    except Exception as e:
+        # Pillow reports corrupt data with a variety of exception types
+        raise ValueError(f"response is not a valid PNG image: {e}") from e
+
+    if processed is not None:
+        f.seek(0)
+        f.truncate()
+        processed.save(f, format='PNG', optimize=True)
+
+
+def get_retry_delay(response, backoff):
+    """
+    Seconds to wait before retrying a rate-limited or failed response.
+
+    Honours a Retry-After header (in seconds or as an HTTP date) like
+    urllib3's Retry does, and falls back to the exponential backoff.
+    """
+    retry_after = response.headers.get('retry-after')
+    if retry_after is None:
+        return backoff
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return backoff
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+async def save_map_response(response, cache_path, postprocess=None):
+    """
+    Validate a successful map response and stream it into the cache.
+
+    Raises:
+        httpx.HTTPStatusError: for error statuses
+        ValueError: if the body is not a decodable PNG of at least MIN_IMAGE_BYTES
+    """
+    response.raise_for_status()
+
+    content_length = int(response.headers.get('content-length', MIN_IMAGE_BYTES))
+    if content_length < MIN_IMAGE_BYTES:
+        raise ValueError(f"response too small for a map image ({content_length} bytes)")
+
+    with atomic_write(cache_path) as f:
+        head = b""
+        size = 0
+        async for chunk in response.aiter_bytes(STREAM_CHUNK_SIZE):
+            if len(head) < len(PNG_SIGNATURE):
+                head += chunk[:len(PNG_SIGNATURE) - len(head)]
+            size += len(chunk)
+            f.write(chunk)
+
+        if not head.startswith(PNG_SIGNATURE):
+            raise ValueError("response is not a PNG image")
+        if size < MIN_IMAGE_BYTES:
+            raise ValueError(f"response too small for a map image ({size} bytes)")
+
+        await asyncio.to_thread(finalize_image, f, postprocess)
+
+
+async def fetch_map(client, url, output_path, sem, rate_sem, postprocess=None):
+    """
+    Fetch a single map image and write it to disk.
+
+    Images already in CACHE_DIR are linked into place without a request;
+    otherwise the response body is streamed into the cache in chunks
+    rather than held in memory.
+
+    Responses that are not a decodable PNG of at least MIN_IMAGE_BYTES
+    (e.g. the over-quota error image) raise ValueError and leave nothing
+    on disk, so the next run retries them.
+
+    Only backs off when Google replies with a status in RETRY_STATUSES
+    (rate limited or transient server error) or the connection fails
+    (httpx.TransportError); all other requests are issued as soon as a
+    slot in the semaphore is free.
+
+    Args:
+        client: Shared httpx.AsyncClient
+        url: Full Static Maps API URL
+        output_path: Path to save the image
+        sem: asyncio.Semaphore bounding the number of concurrent requests
+        rate_sem: asyncio.Semaphore used by throttle() to bound the request rate
+        postprocess: Optional function applied to the decoded image before
+            it is stored in the cache (see finalize_image)
+
+    Returns:
+        True if the image was served from the cache
+    """
+    cache_path = get_cache_path(url)
+    if cache_path.exists():
+        await asyncio.to_thread(link_from_cache, cache_path, output_path)
+        return True
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+    backoff = RETRY_BACKOFF
+    async with sem:
+        for attempt in range(MAX_RETRIES + 1):
+            await throttle(rate_sem)
+            try:
+                async with client.stream("GET", url) as response:
+                    if response.status_code in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = get_retry_delay(response, backoff)
+                    else:
+                        delay = None
+                        await save_map_response(response, cache_path, postprocess)
+            except httpx.TransportError:
+                # Connect/read/timeout/protocol failures are retried like 5xx replies
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = backoff
+
+            if delay is None:
+                break
+
+            # Sleep only once the response is closed, so its pooled
+            # connection / HTTP/2 stream is free for other downloads
+            await asyncio.sleep(delay)
+            backoff *= 2
+
+    await asyncio.to_thread(link_from_cache, cache_path, output_path)
+    return False
+
+
+async def download_satellite_map(client, lat, lon, zoom, output_path, api_key, sem, rate_sem):
     """
     Download a clean satellite image (no labels, markers, or overlays).
 
     Args:
+        client: Shared httpx.AsyncClient
         lat: Latitude of center point
         lon: Longitude of center point
+        zoom: Zoom level (see calculate_zoom_for_1km)
         output_path: Path to save the image
         api_key: Google Maps API key
+        sem: asyncio.Semaphore bounding the number of concurrent requests
+        rate_sem: asyncio.Semaphore bounding the request rate
     """
-    # Calculate appropriate zoom for this latitude
-    zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
-
-    base_url = "https://maps.googleapis.com/maps/api/staticmap"
-
-    params = {
-        'center': f"{lat},{lon}",
-        'zoom': zoom,
-        'size': f"{IMAGE_SIZE}x{IMAGE_SIZE}",
-        'scale': SCALE,
-        'maptype': 'satellite',
-        'key': api_key,
-        # No markers, no labels for clean satellite imagery
-    }
-
-    # Build URL with style to remove all labels from satellite view
-    url = f"{base_url}?center={params['center']}&zoom={params['zoom']}&size={params['size']}&scale={params['scale']}&maptype={params['maptype']}&key={params['key']}"
-
-    # Add style to hide labels on satellite
-    url += "&style=feature:all|element:labels|visibility:off"
+    url = build_map_url(lat, lon, zoom, 'satellite', api_key)
 
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        cached = await fetch_map(client, url, output_path, sem, rate_sem)
 
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
-
-        print(f"  Saved satellite map: {output_path}")
+        print(f"  Saved satellite map: {output_path}{' (cached)' if cached else ''}")
         return True
 
-    except requests.exceptions.RequestException as e:
-        print(f"  Error downloading satellite map: {e}")
+    except (httpx.HTTPError, ValueError, OSError) as e:
+        print(f"  Error downloading satellite map ({output_path}): {e}")
         return False
 
 
-def download_roadmap(lat, lon, output_path, api_key):
+async def download_roadmap(client, lat, lon, zoom, output_path, api_key, sem, rate_sem):
     """
     Download a styled roadmap image.
 
     Args:
+        client: Shared httpx.AsyncClient
         lat: Latitude of center point
         lon: Longitude of center point
+        zoom: Zoom level (see calculate_zoom_for_1km)
         output_path: Path to save the image
         api_key: Google Maps API key
+        sem: asyncio.Semaphore bounding the number of concurrent requests
+        rate_sem: asyncio.Semaphore bounding the request rate
     """
-    # Calculate appropriate zoom for this latitude (must match satellite)
-    zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
+    url = build_map_url(lat, lon, zoom, 'roadmap', api_key)
 
-    base_url = "https://maps.googleapis.com/maps/api/staticmap"
+    try:
+        cached = await fetch_map(client, url, output_path, sem, rate_sem, quantize_roadmap)
 
-    # Build base URL
-    url = f"{base_url}?center={lat},{lon}&zoom={zoom}&size={IMAGE_SIZE}x{IMAGE_SIZE}&scale={SCALE}&maptype=roadmap&key={api_key}"
+        print(f"  Saved roadmap: {output_path}{' (cached)' if cached else ''}")
+        return True
 
-    # Add custom styles
-    style_params = get_roadmap_style_string()
-    for style in style_params:
-        url += f"&{style}"
+    except (httpx.HTTPError, ValueError, OSError) as e:
+        print(f"  Error downloading roadmap ({output_path}): {e}")
+        return False
 
-    try:
-        response = requests.get(url)
-        response.raise_for_status()
 
-        with open(output_path, 'wb') as f:
-            f.write(response.content)
+async def _download_all_maps_async(base_path, api_key):
+    """
+    Queue every missing map and download them concurrently.
 
-        print(f"  Saved roadmap: {output_path}")
-        return True
+    Neighborhoods sharing the same center (to 6 decimal places) are only
+    downloaded once per map type; the other paths are linked to that file.
+    """
+    total = sum(len(city['neighborhoods']) for city in NEIGHBORHOODS.values())
+    current = 0
 
-    except requests.exceptions.RequestException as e:
-        print(f"  Error downloading roadmap: {e}")
-        return False
+    sem = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
+    rate_sem = asyncio.Semaphore(MAX_REQUESTS_PER_SECOND)
+
+    downloaders = {
+        'satellite': download_satellite_map,
+        'roadmap': download_roadmap,
+    }
+
+    # (maptype, rounded lat, rounded lon) -> (lat, lon, zoom, [output paths])
+    queued = {}
+
+    def queue(maptype, lat, lon, zoom, path):
+        key = (maptype, round(lat, 6), round(lon, 6))
+        queued.setdefault(key, (lat, lon, zoom, []))[3].append(path)
+
+    async with create_client() as client:
+        for city_name, city_data in NEIGHBORHOODS.items():
+            print(f"\nProcessing city: {city_name}")
+
+            for neighborhood_name, coords in city_data['neighborhoods'].items():
+                current += 1
+                lat, lon = coords
+
+                print(f"\n  [{current}/{total}] Neighborhood: {neighborhood_name}")
+                print(f"  Coordinates: {lat}, {lon}")
+
+                # Calculate zoom and coverage info
+                zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
+                mpp = meters_per_pixel(lat, zoom)
+                coverage_m = mpp * IMAGE_SIZE * SCALE
+
+                print(f"  Zoom level: {zoom}")
+                print(f"  Coverage: {coverage_m:.0f}m x {coverage_m:.0f}m")
+
+                neighborhood_path = base_path / city_name / neighborhood_name
+
+                # Queue satellite image (skip if already exists)
+                satellite_path = neighborhood_path / "satellite.png"
+                if satellite_path.exists():
+                    print(f"  Satellite map already exists, skipping...")
+                else:
+                    queue('satellite', lat, lon, zoom, satellite_path)
+
+                # Queue roadmap image (skip if already exists)
+                roadmap_path = neighborhood_path / "roadmap.png"
+                if roadmap_path.exists():
+                    print(f"  Roadmap already exists, skipping...")
+                else:
+                    queue('roadmap', lat, lon, zoom, roadmap_path)
+
+        tasks = [
+            downloaders[maptype](client, lat, lon, zoom, paths[0], api_key, sem, rate_sem)
+            for (maptype, _, _), (lat, lon, zoom, paths) in queued.items()
+        ]
+
+        print(f"\nDownloading {len(tasks)} maps ({MAX_CONCURRENT_DOWNLOADS} at a time)...")
+        results = await asyncio.gather(*tasks)
+
+    # Link duplicate locations to the single downloaded copy; a failed link
+    # is counted like a failed download so it shows up in the retry report
+    failed_links = []
+    for ok, (lat, lon, zoom, paths) in zip(results, queued.values()):
+        if not ok:
+            continue
+        for duplicate_path in paths[1:]:
+            try:
+                link_from_cache(paths[0], duplicate_path)
+            except OSError as e:
+                print(f"  Error linking duplicate map ({duplicate_path}): {e}")
+                failed_links.append(False)
+                continue
+            print(f"  Linked duplicate map: {duplicate_path} -> {paths[0]}")
+
+    return total, results + failed_links
 
 
 def download_all_maps(base_path, api_key):
@@ -347,77 +734,46 @@ def download_all_maps(base_path, api_key):
     # Create directory structure
     create_directory_structure(base_path)
 
-    total = sum(len(city['neighborhoods']) for city in NEIGHBORHOODS.values())
-    current = 0
-
-    for city_name, city_data in NEIGHBORHOODS.items():
-        print(f"\nProcessing city: {city_name}")
-
-        for neighborhood_name, coords in city_data['neighborhoods'].items():
-            current += 1
-            lat, lon = coords
-
-            print(f"\n  [{current}/{total}] Neighborhood: {neighborhood_name}")
-            print(f"  Coordinates: {lat}, {lon}")
-
-            # Calculate zoom and coverage info
-            zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
-            mpp = meters_per_pixel(lat, zoom)
-            coverage_m = mpp * IMAGE_SIZE * SCALE
-
-            print(f"  Zoom level: {zoom}")
-            print(f"  Coverage: {coverage_m:.0f}m x {coverage_m:.0f}m")
-
-            neighborhood_path = base_path / city_name / neighborhood_name
-
-            # Download satellite image (skip if already exists)
-            satellite_path = neighborhood_path / "satellite.png"
-            if satellite_path.exists():
-                print(f"  Satellite map already exists, skipping...")
-            else:
-                download_satellite_map(lat, lon, satellite_path, api_key)
-                time.sleep(2)  # Delay to avoid rate limiting
-
-            # Download roadmap image (skip if already exists)
-            roadmap_path = neighborhood_path / "roadmap.png"
-            if roadmap_path.exists():
-                print(f"  Roadmap already exists, skipping...")
-            else:
-                download_roadmap(lat, lon, roadmap_path, api_key)
-                time.sleep(2)  # Delay between neighborhoods
+    total, results = asyncio.run(_download_all_maps_async(base_path, api_key))
 
     print(f"\n{'='*60}")
     print("Download complete!")
     print(f"Maps saved to: {base_path}")
     print(f"Total neighborhoods processed: {total}")
+    if not all(results):
+        print(f"Failed downloads: {results.count(False)} (re-run to retry)")
 
 
 def generate_coordinates_report(base_path):
     """Generate a report of all coordinates used."""
     report_path = Path(base_path) / "coordinates_report.txt"
 
-    with open(report_path, 'w') as f:
-        f.write("Aedes aegypti Study Areas - Coordinate Report\n")
-        f.write("=" * 60 + "\n\n")
-        f.write("Reference: Codeco et al. (2015) PLoS Negl Trop Dis\n")
-        f.write("DOI: 10.1371/journal.pntd.0003475\n\n")
+    # Build the whole report in memory and write it in one go
+    lines = [
+        "Aedes aegypti Study Areas - Coordinate Report\n",
+        "=" * 60 + "\n\n",
+        "Reference: Codeco et al. (2015) PLoS Negl Trop Dis\n",
+        "DOI: 10.1371/journal.pntd.0003475\n\n",
+    ]
 
-        for city_name, city_data in NEIGHBORHOODS.items():
-            f.write(f"\n{city_name}\n")
-            f.write("-" * 40 + "\n")
-            f.write(f"City center reference: {city_data['city_coords']}\n\n")
+    for city_name, city_data in NEIGHBORHOODS.items():
+        lines.append(f"\n{city_name}\n")
+        lines.append("-" * 40 + "\n")
+        lines.append(f"City center reference: {city_data['city_coords']}\n\n")
 
-            for neighborhood_name, coords in city_data['neighborhoods'].items():
-                lat, lon = coords
-                zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
-                mpp = meters_per_pixel(lat, zoom)
-                coverage = mpp * IMAGE_SIZE * SCALE
+        for neighborhood_name, coords in city_data['neighborhoods'].items():
+            lat, lon = coords
+            zoom = calculate_zoom_for_1km(lat, IMAGE_SIZE)
+            mpp = meters_per_pixel(lat, zoom)
+            coverage = mpp * IMAGE_SIZE * SCALE
+
+            lines.append(f"  {neighborhood_name}:\n")
+            lines.append(f"    Latitude:  {lat}\n")
+            lines.append(f"    Longitude: {lon}\n")
+            lines.append(f"    Zoom:      {zoom}\n")
+            lines.append(f"    Coverage:  ~{coverage:.0f}m x {coverage:.0f}m\n\n")
 
-                f.write(f"  {neighborhood_name}:\n")
-                f.write(f"    Latitude:  {lat}\n")
-                f.write(f"    Longitude: {lon}\n")
-                f.write(f"    Zoom:      {zoom}\n")
-                f.write(f"    Coverage:  ~{coverage:.0f}m x {coverage:.0f}m\n\n")
+    report_path.write_text("".join(lines))
 
     print(f"Coordinates report saved to: {report_path}")
 